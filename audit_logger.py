@@ -1,22 +1,57 @@
 """Security audit logging for the LLM Guardrail Proxy."""
 import os
-from datetime import datetime
+import queue
+import threading
+import time
 from typing import Optional
 from config import settings
 
 
+# Bytes template for one log line; filled in with pre-encoded fields so the
+# flusher can write batches without any further encoding
+_LOG_LINE_TEMPLATE = b"%s | %s | %s | %s | %s\n"
+
+
 class AuditLogger:
-    """Handles security audit logging to file."""
-    
+    """Handles security audit logging to file.
+
+    Log lines are enqueued on the request path and written by a background
+    flusher thread, which batches them into a single write every
+    ``audit_buffer_size`` events or ``audit_flush_interval`` seconds
+    (whichever comes first). This keeps file I/O off the request hot path
+    and collapses many small writes into one syscall.
+    """
+
+    # Sentinel used to wake the flusher thread for shutdown
+    _SHUTDOWN = object()
+
     def __init__(self, log_file_path: Optional[str] = None):
         """Initialize the audit logger.
-        
+
         Args:
             log_file_path: Path to the log file. Defaults to settings.log_file_path.
         """
         self.log_file_path = log_file_path or settings.log_file_path
+        self.buffer_size = settings.audit_buffer_size
+        self.flush_interval = settings.audit_flush_interval
         self._ensure_log_file()
-    
+
+        # Open the file once in append-binary mode with a large buffer and
+        # reuse the handle for the life of the process (no open/close churn
+        # per event). The lock serializes writes between the flusher thread
+        # and the shutdown path.
+        self._fh = open(self.log_file_path, 'ab', buffering=1 << 16)
+        self._write_lock = threading.Lock()
+
+        # Queue of formatted log lines drained by the background flusher
+        self._queue: queue.Queue = queue.Queue()
+        self._flusher_thread = threading.Thread(
+            target=self._flusher,
+            name="audit-log-flusher",
+            daemon=True,
+        )
+        self._flusher_thread.start()
+
     def _ensure_log_file(self):
         """Ensure the log file exists."""
         if not os.path.exists(self.log_file_path):
@@ -24,11 +59,75 @@ class AuditLogger:
             with open(self.log_file_path, 'w') as f:
                 f.write("Timestamp | IP Address | Attack Type | Payload | Status\n")
                 f.write("-" * 100 + "\n")
-    
+
     def _get_timestamp(self) -> str:
-        """Get current timestamp in ISO format."""
-        return datetime.now().isoformat()
-    
+        """Get current timestamp in ISO format.
+
+        Formats from a single time.time() call rather than constructing a
+        datetime object per event - noticeably cheaper on the hot path.
+        """
+        now = time.time()
+        return "%s.%06d" % (
+            time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now)),
+            int(now % 1 * 1_000_000),
+        )
+
+    def _flusher(self):
+        """Background worker: drain the queue and write batches to disk."""
+        while True:
+            batch = []
+            try:
+                # Block until at least one entry arrives (or the interval passes)
+                item = self._queue.get(timeout=self.flush_interval)
+                if item is self._SHUTDOWN:
+                    break
+                batch.append(item)
+                # Drain whatever else is already queued, up to the batch cap
+                while len(batch) < self.buffer_size:
+                    item = self._queue.get_nowait()
+                    if item is self._SHUTDOWN:
+                        self._write_batch(batch)
+                        return
+                    batch.append(item)
+            except queue.Empty:
+                pass
+
+            if batch:
+                self._write_batch(batch)
+
+        # Shutdown: flush anything still queued
+        self._drain_remaining()
+
+    def _write_batch(self, batch):
+        """Write a batch of log lines with a single write + flush."""
+        with self._write_lock:
+            self._fh.write(b"".join(batch))
+            self._fh.flush()
+
+    def _drain_remaining(self):
+        """Flush any entries left in the queue (shutdown path)."""
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not self._SHUTDOWN:
+                batch.append(item)
+        if batch:
+            self._write_batch(batch)
+
+    def close(self):
+        """Stop the flusher, drain pending entries, and close the log file.
+
+        Called from the FastAPI lifespan shutdown path.
+        """
+        self._queue.put_nowait(self._SHUTDOWN)
+        self._flusher_thread.join(timeout=5.0)
+        self._drain_remaining()
+        with self._write_lock:
+            self._fh.close()
+
     def log_security_event(
         self,
         ip_address: str,
@@ -37,7 +136,7 @@ class AuditLogger:
         status: str,
     ):
         """Log a security event.
-        
+
         Args:
             ip_address: Client IP address
             attack_type: Type of attack detected (e.g., "PII_DETECTED", "INJECTION_DETECTED", "SAFE_REQUEST")
@@ -45,18 +144,25 @@ class AuditLogger:
             status: Status of the request (e.g., "BLOCKED", "ALLOWED")
         """
         timestamp = self._get_timestamp()
-        
+
         # Truncate payload if too long (for readability)
         truncated_payload = payload[:200] + "..." if len(payload) > 200 else payload
-        
+
         # Escape newlines in payload for single-line log format
         sanitized_payload = truncated_payload.replace("\n", "\\n").replace("\r", "\\r")
-        
-        log_entry = f"{timestamp} | {ip_address} | {attack_type} | {sanitized_payload} | {status}\n"
-        
-        with open(self.log_file_path, 'a') as f:
-            f.write(log_entry)
-    
+
+        # Encode once here so the flusher can write batches as raw bytes
+        log_entry = _LOG_LINE_TEMPLATE % (
+            timestamp.encode("ascii"),
+            ip_address.encode("utf-8"),
+            attack_type.encode("ascii"),
+            sanitized_payload.encode("utf-8"),
+            status.encode("ascii"),
+        )
+
+        # Hand off to the background flusher; no disk I/O on the request path
+        self._queue.put_nowait(log_entry)
+
     def log_pii_detection(self, ip_address: str, payload: str):
         """Log a PII detection event."""
         self.log_security_event(
@@ -65,7 +171,7 @@ class AuditLogger:
             payload=payload,
             status="BLOCKED"
         )
-    
+
     def log_injection_detection(self, ip_address: str, payload: str):
         """Log a prompt injection detection event."""
         self.log_security_event(
@@ -74,7 +180,7 @@ class AuditLogger:
             payload=payload,
             status="BLOCKED"
         )
-    
+
     def log_safe_request(self, ip_address: str, payload: str):
         """Log a safe request that was allowed."""
         self.log_security_event(
@@ -87,4 +193,3 @@ class AuditLogger:
 
 # Global logger instance
 audit_logger = AuditLogger()
-
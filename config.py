@@ -12,6 +12,20 @@ class Settings(BaseSettings):
     
     # Security Thresholds
     similarity_threshold: float = 0.85
+
+    # Request Validation: longest accepted user_query, in characters.
+    # Bounds the worst-case detector scan cost per request.
+    max_prompt_length: int = 16384
+
+    # Audit Logging
+    audit_buffer_size: int = 100
+    audit_flush_interval: float = 0.05
+
+    # LLM Response Cache (off by default: Gemini responses are not
+    # strictly deterministic, so repeat prompts would get a frozen answer)
+    llm_cache_enabled: bool = False
+    llm_cache_maxsize: int = 2048
+    llm_cache_ttl: float = 300.0
     
     # File Paths
     log_file_path: str = "security_logs.txt"
@@ -1,9 +1,51 @@
 """Google Gemini API client for LLM interactions using the new google-genai SDK."""
+import asyncio
+import hashlib
+import random
+import time
+
 import google.genai as genai
 from config import settings
 from typing import Optional
 
 
+# Status codes / error substrings that mean "this model is unavailable or
+# out of quota" - the retry loops switch to the next model instead of
+# retrying the same one
+_FALLBACK_STATUS_CODES = frozenset({404, 429})
+_FALLBACK_ERROR_MARKERS = ('404', 'not found', '429', 'quota', 'resource_exhausted')
+
+# Retry backoff bounds (seconds): decorrelated jitter, capped so retries
+# never add multi-second sleeps to a request
+_BACKOFF_BASE = 0.05
+_BACKOFF_CAP = 1.0
+
+
+def _is_model_fallback_error(error: Exception) -> bool:
+    """Check whether an error calls for falling back to the next model.
+
+    Classifies by the SDK's status code when the exception carries one
+    (google.genai APIError subclasses expose .code / .status_code), which
+    is both cheaper and robust against message-wording changes. Only
+    exceptions without a code fall back to scanning the message once.
+    """
+    code = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if code is not None:
+        return code in _FALLBACK_STATUS_CODES
+
+    error_str = str(error).lower()
+    return any(marker in error_str for marker in _FALLBACK_ERROR_MARKERS)
+
+
+def _next_backoff(delay: float) -> float:
+    """Compute the next retry delay using capped decorrelated jitter.
+
+    Randomized delays keep concurrent clients from synchronizing their
+    retries into a thundering herd against the upstream API.
+    """
+    return min(_BACKOFF_CAP, random.uniform(_BACKOFF_BASE, max(_BACKOFF_BASE, delay * 3)))
+
+
 class LLMClient:
     """Client for interacting with Google Gemini API using the new SDK."""
     
@@ -28,6 +70,80 @@ class LLMClient:
         # This is more reliable than specific version numbers which may be deprecated
         # Alternative models: gemini-2.5-flash, gemini-flash-lite-latest (lighter/quicker)
         self.model_name = 'gemini-flash-latest'
+
+        # Optional TTL cache of responses keyed on a prompt hash. Repeated
+        # prompts (health probes, demos, duplicate pastes) skip the API
+        # round-trip entirely - the most expensive step in the request.
+        self._cache_enabled = settings.llm_cache_enabled
+        self._cache_maxsize = settings.llm_cache_maxsize
+        self._cache_ttl = settings.llm_cache_ttl
+        self._response_cache = {}  # key -> (expires_at, response_text)
+
+    # Fallback chain tried after the configured model
+    # Order: latest alias -> specific version -> lite version (for quota/performance)
+    FALLBACK_MODELS = (
+        'gemini-2.5-flash',  # Latest stable version
+        'gemini-flash-lite-latest',  # Lighter version if quota issues
+        'gemini-2.0-flash-lite',  # Fallback lite version
+    )
+
+    def _model_candidates(self) -> list:
+        """Model names to try, most preferred first."""
+        candidates = [self.model_name]
+        for name in self.FALLBACK_MODELS:
+            if name != self.model_name:
+                candidates.append(name)
+        return candidates
+
+    def _finish(self, model_name: str, cache_key: bytes, response) -> str:
+        """Validate a raw response and finalize the attempt loop.
+
+        Shared by the sync and async paths: rejects empty responses,
+        records a model fallback, and populates the response cache.
+        """
+        if not response.text or response.text.strip() == '':
+            raise ValueError("Empty response from model")
+
+        # If we used a different model, update the default
+        if model_name != self.model_name:
+            print(f"Using model: {model_name} (fallback from {self.model_name})")
+            self.model_name = model_name
+
+        result = response.text.strip()
+        self._cache_put(cache_key, result)
+        return result
+
+    @staticmethod
+    def _cache_key(prompt: str) -> bytes:
+        """Hash the prompt so raw user text is never held as a cache key."""
+        return hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).digest()
+
+    def _cache_get(self, key: bytes) -> Optional[str]:
+        """Return a cached response if present and not expired."""
+        if not self._cache_enabled:
+            return None
+        entry = self._response_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at < time.monotonic():
+            del self._response_cache[key]
+            return None
+        return text
+
+    def _cache_put(self, key: bytes, text: str):
+        """Store a response, evicting expired then oldest entries when full."""
+        if not self._cache_enabled:
+            return
+        if len(self._response_cache) >= self._cache_maxsize:
+            now = time.monotonic()
+            expired = [k for k, (exp, _) in self._response_cache.items() if exp < now]
+            for k in expired:
+                del self._response_cache[k]
+            # Still full after pruning: drop the oldest insertion
+            if len(self._response_cache) >= self._cache_maxsize:
+                self._response_cache.pop(next(iter(self._response_cache)))
+        self._response_cache[key] = (time.monotonic() + self._cache_ttl, text)
     
     async def generate_response(self, prompt: str, max_retries: int = 3) -> str:
         """Generate a response from the LLM.
@@ -42,65 +158,48 @@ class LLMClient:
         Raises:
             Exception: If API call fails after retries
         """
-        # Since the new SDK's generate_content is synchronous, run it in executor
-        import asyncio
-        loop = asyncio.get_event_loop()
-        
+        # Serve repeat prompts from the cache (no-op unless enabled)
+        cache_key = self._cache_key(prompt)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Single attempt loop: each exception is classified exactly once.
+        # Fallback errors (404/429/quota) move straight to the next model;
+        # other errors retry the same model with backoff and abort the whole
+        # chain once retries are exhausted, since a different model won't fix
+        # a network or request problem.
+        models = self._model_candidates()
         last_error = None
-        
-        # Try alternative model names if primary fails
-        # Order: latest alias -> specific version -> lite version (for quota/performance)
-        model_names_to_try = [
-            self.model_name,  # gemini-flash-latest
-            'gemini-2.5-flash',  # Latest stable version
-            'gemini-flash-lite-latest',  # Lighter version if quota issues
-            'gemini-2.0-flash-lite',  # Fallback lite version
-        ]
-        
-        for model_name in model_names_to_try:
+
+        for model_name in models:
+            delay = _BACKOFF_BASE
             for attempt in range(max_retries):
                 try:
-                    # Helper function to generate with specific model
-                    def _generate(model: str):
-                        return self.client.models.generate_content(
-                            model=model,
-                            contents=prompt
-                        )
-                    
-                    # Run the synchronous generate_content in an executor
-                    response = await loop.run_in_executor(None, _generate, model_name)
-                    
-                    # Extract text from response (new API has .text attribute directly)
-                    if not response.text or response.text.strip() == '':
-                        raise ValueError("Empty response from model")
-                    
-                    # If we used a different model, update the default
-                    if model_name != self.model_name:
-                        print(f"Using model: {model_name} (fallback from {self.model_name})")
-                        self.model_name = model_name
-                    
-                    return response.text.strip()
-                        
+                    # The SDK's native async surface awaits the HTTP call
+                    # directly - no threadpool hop per request
+                    response = await self.client.aio.models.generate_content(
+                        model=model_name,
+                        contents=prompt
+                    )
+                    return self._finish(model_name, cache_key, response)
+
                 except Exception as e:
                     last_error = e
-                    # If it's a 404 (model not found) or 429 (quota exceeded), try next model name
-                    error_str = str(e)
-                    if '404' in error_str or 'not found' in error_str.lower() or '429' in error_str or 'quota' in error_str.lower() or 'RESOURCE_EXHAUSTED' in error_str:
+                    if _is_model_fallback_error(e):
                         break  # Try next model name
-                    
-                    if attempt < max_retries - 1:
-                        # Wait before retry (exponential backoff)
-                        await asyncio.sleep(2 ** attempt)
-            
-            # If we got here and last_error exists, try next model
-            error_str = str(last_error) if last_error else ''
-            if last_error and ('404' in error_str or 'not found' in error_str.lower() or '429' in error_str or 'quota' in error_str.lower() or 'RESOURCE_EXHAUSTED' in error_str):
-                continue
-        
-        # If all models failed, raise the last error
-        raise Exception(f"Failed to generate response after trying {len(model_names_to_try)} model(s): {str(last_error)}")
-        
-        raise last_error
+
+                    if attempt == max_retries - 1:
+                        raise Exception(
+                            f"Failed to generate response with {model_name}: {e}"
+                        )
+
+                    # Wait before retry (capped jittered backoff)
+                    delay = _next_backoff(delay)
+                    await asyncio.sleep(delay)
+
+        # Every model in the chain was unavailable or out of quota
+        raise Exception(f"Failed to generate response after trying {len(models)} model(s): {str(last_error)}")
     
     def generate_response_sync(self, prompt: str, max_retries: int = 3) -> str:
         """Generate a response synchronously (for non-async contexts).
@@ -115,18 +214,18 @@ class LLMClient:
         Raises:
             Exception: If API call fails after retries
         """
+        # Serve repeat prompts from the cache (no-op unless enabled)
+        cache_key = self._cache_key(prompt)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Same attempt loop as generate_response, with blocking sleeps
+        models = self._model_candidates()
         last_error = None
-        
-        # Try alternative model names if primary fails
-        # Order: latest alias -> specific version -> lite version (for quota/performance)
-        model_names_to_try = [
-            self.model_name,  # gemini-flash-latest
-            'gemini-2.5-flash',  # Latest stable version
-            'gemini-flash-lite-latest',  # Lighter version if quota issues
-            'gemini-2.0-flash-lite',  # Fallback lite version
-        ]
-        
-        for model_name in model_names_to_try:
+
+        for model_name in models:
+            delay = _BACKOFF_BASE
             for attempt in range(max_retries):
                 try:
                     # Generate content using the new API
@@ -135,38 +234,24 @@ class LLMClient:
                         model=model_name,
                         contents=prompt
                     )
-                    
-                    # Extract text from response (new API has .text attribute directly)
-                    if not response.text or response.text.strip() == '':
-                        raise ValueError("Empty response from model")
-                    
-                    # If we used a different model, update the default
-                    if model_name != self.model_name:
-                        print(f"Using model: {model_name} (fallback from {self.model_name})")
-                        self.model_name = model_name
-                    
-                    return response.text.strip()
-                    
+                    return self._finish(model_name, cache_key, response)
+
                 except Exception as e:
                     last_error = e
-                    # If it's a 404 (model not found) or 429 (quota exceeded), try next model name
-                    error_str = str(e)
-                    if '404' in error_str or 'not found' in error_str.lower() or '429' in error_str or 'quota' in error_str.lower() or 'RESOURCE_EXHAUSTED' in error_str:
+                    if _is_model_fallback_error(e):
                         break  # Try next model name
-                    
-                    if attempt < max_retries - 1:
-                        import time
-                        time.sleep(2 ** attempt)
-            
-            # If we got here and last_error exists, try next model
-            error_str = str(last_error) if last_error else ''
-            if last_error and ('404' in error_str or 'not found' in error_str.lower() or '429' in error_str or 'quota' in error_str.lower() or 'RESOURCE_EXHAUSTED' in error_str):
-                continue
-        
-        # If all models failed, raise the last error
-        raise Exception(f"Failed to generate response after trying {len(model_names_to_try)} model(s): {str(last_error)}")
-        
-        raise last_error
+
+                    if attempt == max_retries - 1:
+                        raise Exception(
+                            f"Failed to generate response with {model_name}: {e}"
+                        )
+
+                    # Wait before retry (capped jittered backoff)
+                    delay = _next_backoff(delay)
+                    time.sleep(delay)
+
+        # Every model in the chain was unavailable or out of quota
+        raise Exception(f"Failed to generate response after trying {len(models)} model(s): {str(last_error)}")
 
 
 # Global client instance (will be initialized in main.py)
@@ -1,8 +1,11 @@
 """FastAPI application for the LLM Guardrail Proxy."""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
 import uvicorn
 
 from config import settings
@@ -14,6 +17,11 @@ from llm_client import get_llm_client
 pii_detector = None
 injection_detector = None
 
+# Dedicated executor for CPU-bound detector scans (created in lifespan).
+# Keeping these off the default executor means the regex work never queues
+# behind the LLM SDK calls that run there.
+detector_executor = None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -22,24 +30,41 @@ async def lifespan(app: FastAPI):
     Note: Models are initialized lazily on first request to avoid mutex lock issues
     with --reload. This is safer than initializing here.
     """
+    global detector_executor
+    detector_executor = ThreadPoolExecutor(
+        max_workers=os.cpu_count(),
+        thread_name_prefix="detector"
+    )
+
     # Application runs here - models will be loaded on first use
     yield
-    
+
     # Cleanup (optional, but good practice)
     print("Shutting down...")
+    detector_executor.shutdown(wait=False)
+    # Flush any audit log entries still buffered in the background flusher
+    audit_logger.close()
 
 
 app = FastAPI(
     title="LLM Guardrail Proxy",
     description="Security middleware for LLM applications",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson serializes responses several times faster than stdlib json
+    default_response_class=ORJSONResponse
 )
 
 
 class PromptRequest(BaseModel):
-    """Request model for chat endpoint."""
-    user_query: str
+    """Request model for chat endpoint.
+
+    The length bounds reject empty and oversize bodies at validation time,
+    before any detector or LLM work runs. The upper bound comes from
+    settings (max_prompt_length) so deployments with long prompts can
+    raise it without touching code.
+    """
+    user_query: str = Field(min_length=1, max_length=settings.max_prompt_length)
 
 
 class ChatResponse(BaseModel):
@@ -56,20 +81,24 @@ def get_client_ip(request: Request) -> str:
     Returns:
         Client IP address as string
     """
-    # Check for forwarded IP (if behind proxy)
-    forwarded = request.headers.get("X-Forwarded-For")
+    headers = request.headers
+
+    # Check for forwarded IP (if behind proxy); partition avoids building
+    # a list for the common single-IP header
+    forwarded = headers.get("X-Forwarded-For")
     if forwarded:
-        return forwarded.split(",")[0].strip()
-    
+        return forwarded.partition(",")[0].strip()
+
     # Check for real IP
-    real_ip = request.headers.get("X-Real-IP")
+    real_ip = headers.get("X-Real-IP")
     if real_ip:
         return real_ip
-    
+
     # Fallback to direct client
-    if request.client:
-        return request.client.host
-    
+    client = request.client
+    if client:
+        return client.host
+
     return "unknown"
 
 
@@ -109,7 +138,7 @@ def _ensure_models_loaded():
             raise
 
 
-@app.post("/chat", response_model=ChatResponse)
+@app.post("/chat", response_model=ChatResponse, response_class=ORJSONResponse)
 async def secure_chat(request: PromptRequest, http_request: Request):
     """Secure chat endpoint with PII and injection detection.
     
@@ -128,31 +157,76 @@ async def secure_chat(request: PromptRequest, http_request: Request):
     
     user_query = request.user_query
     client_ip = get_client_ip(http_request)
-    
-    # Step 1: Check for PII/Sensitive Data
-    if pii_detector.contains_sensitive_data(user_query):
+    llm_client = get_llm_client()
+
+    # Steps 1+2: Overlap the two CPU-bound local scans on the threadpool
+    # (so they don't block the event loop). The classifier is NOT started
+    # yet: detect_via_classifier embeds the raw query in a prompt sent to
+    # Gemini, so it must wait for the PII verdict - otherwise a query
+    # holding an SSN or API key would leave the process before the 400.
+    loop = asyncio.get_running_loop()
+    pii_task = loop.run_in_executor(
+        detector_executor, pii_detector.contains_sensitive_data, user_query
+    )
+    pattern_task = loop.run_in_executor(
+        detector_executor, injection_detector.detect_via_pattern_matching, user_query
+    )
+
+    # PII verdict first: it gates anything that transmits the query
+    # externally. Detectors fail closed internally, so a raised exception
+    # here is unexpected - treat it as a block too.
+    try:
+        pii_hit = await pii_task
+    except Exception:
+        pii_hit = True
+
+    if pii_hit:
         # Log the security incident
         audit_logger.log_pii_detection(client_ip, user_query)
-        
+
         # Get entity details for better error message
         entities = pii_detector.get_entity_summary(user_query)
-        
+
         raise HTTPException(
             status_code=400,
             detail=f"Security Alert: PII or Secrets detected. {entities}"
         )
-    
-    # Step 2: Check for Prompt Injection
-    llm_client = get_llm_client()
-    is_injection, detection_method = await injection_detector.is_jailbreak_attempt(
-        user_query,
-        llm_client=llm_client
-    )
-    
-    if is_injection:
+
+    # The query is PII-clean: the classifier round-trip may start now and
+    # overlap the pattern verdict. Short, benign-looking inputs skip it.
+    classifier_task = None
+    if injection_detector.needs_classifier_check(user_query):
+        classifier_task = asyncio.create_task(
+            injection_detector.detect_via_classifier(user_query, llm_client)
+        )
+
+    try:
+        is_injection_pattern, pattern_score = await pattern_task
+    except Exception:
+        is_injection_pattern, pattern_score = True, 1.0
+
+    if is_injection_pattern:
+        if classifier_task is not None:
+            classifier_task.cancel()
+        detection_method = f"pattern_matching (score: {pattern_score:.3f})"
+    elif classifier_task is None:
+        # Benign fast path: short input with no suspicious tokens
+        is_injection_classifier, detection_method = False, "fast_path"
+    else:
+        # Local scans are clean; the classifier verdict is the tiebreaker
+        try:
+            is_injection_classifier, reason = await classifier_task
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Fail-closed: an unexpected classifier failure blocks
+            is_injection_classifier, reason = True, "Classifier error - failing closed for security"
+        detection_method = f"classifier ({reason})"
+
+    if is_injection_pattern or is_injection_classifier:
         # Log the security incident
         audit_logger.log_injection_detection(client_ip, user_query)
-        
+
         raise HTTPException(
             status_code=403,
             detail=f"Security Alert: Prompt Injection detected via {detection_method}."
@@ -185,7 +259,7 @@ async def secure_chat(request: PromptRequest, http_request: Request):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Custom exception handler for HTTP exceptions."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail}
     )
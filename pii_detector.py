@@ -1,22 +1,88 @@
 """Lightweight PII detection using regex patterns (no heavy dependencies)."""
+import logging
 import re
-from typing import List, Dict, Optional
+from collections import Counter
+from typing import List, Dict, NamedTuple, Optional
 
+_log = logging.getLogger(__name__)
 
-class PIIDetector:
-    """Detects Personally Identifiable Information in text using regex patterns."""
-    
-    # Comprehensive regex patterns for common PII types
-    PATTERNS = {
+# Optional: google-re2 matches in guaranteed linear time, closing off any
+# remaining backtracking behavior on attacker-controlled input. Patterns it
+# cannot compile (lookaround) stay on the stdlib engine.
+try:
+    import re2 as _re2
+except ImportError:
+    _re2 = None
+
+
+# Deletion table for str.translate: one C-level pass strips formatting from
+# matched numbers, replacing the regex-engine invocation of re.sub(r'\D').
+# Matches come from ASCII-only patterns, so covering the first 256 code
+# points is sufficient.
+_NON_DIGIT_TABLE = {c: None for c in range(256) if not (48 <= c <= 57)}
+
+# Prefilter probes: every PII type requires at least one of these triggers
+# (a digit, an '@', a known key prefix, or a 40+ alphanumeric run), so text
+# with none of them cannot contain a match and skips the fused scan entirely
+_HAS_DIGIT = re.compile(r'\d').search
+_HAS_LONG_ALNUM_RUN = re.compile(r'[A-Za-z0-9]{40}').search
+_KEY_PREFIXES = ('sk-', 'ghp_', 'xoxb-')
+
+
+def _may_contain_pii(text: str) -> bool:
+    """Cheap constant-ish time check for any PII trigger character.
+
+    '@' and the key prefixes use CPython's C-level substring search; the
+    two regex probes are single literal-class scans. Clean chat text fails
+    all of them and never reaches the full pattern engine.
+    """
+    if '@' in text or _HAS_DIGIT(text):
+        return True
+    if any(prefix in text for prefix in _KEY_PREFIXES):
+        return True
+    # CRYPTO_WALLET / generic API keys can be letters-only hex/alnum runs
+    return _HAS_LONG_ALNUM_RUN(text) is not None
+
+
+def _build_combined_pattern(patterns: Dict[str, "re.Pattern"], order, as_bytes: bool = False):
+    """Fuse the per-type patterns into one named-group alternation.
+
+    A single finditer pass over the text replaces one pass per entity type;
+    match.lastgroup recovers which type fired. Compiled with RE2 when
+    available and the pattern is within its supported syntax. With
+    ``as_bytes`` the same pattern compiles against bytes for the ASCII
+    fast path (bytes matching skips per-step codepoint handling).
+    """
+    pattern_str = "|".join(f"(?P<{name}>{patterns[name].pattern})" for name in order)
+    pattern_src = pattern_str.encode('ascii') if as_bytes else pattern_str
+    if _re2 is not None:
+        try:
+            return _re2.compile(pattern_src)
+        except Exception:
+            # RE2 rejects lookaround; use the stdlib engine for those
+            pass
+    return re.compile(pattern_src)
+
+
+# Comprehensive regex patterns for common PII types. Module-level (rather
+# than class attributes) so the scan loops read them as globals without a
+# LOAD_ATTR per access.
+PATTERNS = {
         'EMAIL': re.compile(
             r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
             re.IGNORECASE
         ),
         'PHONE_US': re.compile(
-            r'(\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}|\d{3}[-.\s]?\d{3}[-.\s]?\d{4})'
+            # Non-capturing: only group(0) is ever read, and the optional
+            # parens already subsume the old no-parens alternation branch
+            r'(?:\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})'
         ),
         'PHONE_INTERNATIONAL': re.compile(
-            r'\+?\d{1,4}[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9}'
+            # Left-guarded with bounded digit groups: the lookbehind keeps
+            # inner positions of a digit run from re-starting the match (the
+            # old fully-optional form backtracked quadratically there) while
+            # still catching non-"+" numbers anywhere in the text
+            r'(?<!\d)\+?\d{1,3}[-.\s]?\(?\d{1,4}\)?(?:[-.\s]?\d{2,4}){1,4}'
         ),
         'SSN': re.compile(
             r'\b\d{3}-?\d{2}-?\d{4}\b'
@@ -31,14 +97,66 @@ class PIIDetector:
             r'\b[A-Z]{2}\d{2}[A-Z0-9]{4,30}\b'
         ),
         'CRYPTO_WALLET': re.compile(
-            r'\b(0x)?[A-Fa-f0-9]{40,64}\b'
+            # Trailing lookahead makes the bounded quantifier unambiguous -
+            # no retry at each shorter length inside a longer hex run
+            r'\b(?:0x)?[A-Fa-f0-9]{40,64}(?![A-Fa-f0-9])'
         ),
         'API_KEY': re.compile(
-            # Match common API key prefixes (sk-, ghp_, xoxb-, etc.) OR long alphanumeric strings (40+ chars to avoid MD5/session IDs)
-            r'\b(?:sk-[A-Za-z0-9]{20,}|ghp_[A-Za-z0-9]{20,}|xoxb-[A-Za-z0-9-]{20,}|[A-Za-z0-9]{40,})\b'
+            # Match common API key prefixes (sk-, ghp_, xoxb-, etc.) OR long
+            # alphanumeric strings (40+ chars to avoid MD5/session IDs).
+            # Open upper bounds: with the lookaround guards the quantifier
+            # consumes each run exactly once (no fan-out), and a cap would
+            # make runs longer than it match nothing at all.
+            r'(?:(?<![A-Za-z0-9])(?:sk-|ghp_|xoxb-)[A-Za-z0-9-]{20,}(?![A-Za-z0-9-])'
+            r'|(?<![A-Za-z0-9])[A-Za-z0-9]{40,}(?![A-Za-z0-9]))'
         ),
-    }
-    
+}
+
+# Alternation order for the fused pattern. Leftmost-first semantics mean
+# earlier alternatives win at a given position, so the most specific types
+# go first: CREDIT_CARD before PHONE_US (a bare 16-digit number would
+# otherwise report as a 10-digit phone) and the catch-all
+# PHONE_INTERNATIONAL last.
+_COMBINED_ORDER = (
+    'EMAIL', 'CREDIT_CARD', 'PHONE_US', 'SSN', 'IP_ADDRESS',
+    'IBAN', 'CRYPTO_WALLET', 'API_KEY', 'PHONE_INTERNATIONAL',
+)
+
+COMBINED = _build_combined_pattern(PATTERNS, _COMBINED_ORDER)
+
+# Bytes-compiled twin of COMBINED. Pure-ASCII text (the overwhelmingly
+# common case) is scanned as a bytes buffer, where the engine walks raw
+# bytes instead of str code points and byte offsets equal character
+# offsets. Non-ASCII text falls back to the str engine above.
+COMBINED_BYTES = _build_combined_pattern(PATTERNS, _COMBINED_ORDER, as_bytes=True)
+
+
+class Entity(NamedTuple):
+    """One detected PII span.
+
+    A NamedTuple instead of a dict: no per-entity hash table, attribute
+    access compiles to an index load, and dozens of hits on a dense input
+    cost a fraction of the allocator churn. Callers that need the old
+    dict shape get it via ``_asdict()``.
+    """
+    entity_type: str
+    start: int
+    end: int
+    score: float
+    text: str
+
+
+class PIIDetector:
+    """Detects Personally Identifiable Information in text using regex patterns."""
+
+    # The detector carries no per-instance state; an empty __slots__ skips
+    # the per-instance __dict__ allocation
+    __slots__ = ()
+
+    # Class-level aliases kept for existing callers
+    PATTERNS = PATTERNS
+    COMBINED = COMBINED
+
     def __init__(self):
         """Initialize the lightweight PII detector."""
         pass
@@ -53,11 +171,93 @@ class PIIDetector:
             True if PII is detected, False otherwise
         """
         try:
-            return len(self.get_detected_entities(text)) > 0
-        except Exception as e:
+            # Dedicated yes/no scan: no entity dicts, no list, no overlap
+            # pass - just search/validate until the first confirmed hit
+            return self._has_validated_match(text)
+        except Exception:
             # Fail-closed: If detection fails, assume PII is present (safer default)
-            print(f"PII detection error (failing closed): {e}")
+            _log.exception("PII detection failed; failing closed")
             return True
+
+    def _has_validated_match(self, text: str) -> bool:
+        """Return whether any validated match exists, allocating nothing.
+
+        Clean inputs exit at the prefilter or after a single search miss;
+        inputs with matches stop at the first one a validator accepts.
+        A rejected match resumes the search one character past its start,
+        not past its end: a span one type claims but fails to validate
+        (say, a card number with a typo) must stay visible to the other
+        types whose own interpretation would have matched inside it.
+        """
+        if not _may_contain_pii(text):
+            return False
+
+        validators = self._VALIDATORS
+        buf = text.encode('utf-8')
+        if len(buf) == len(text):
+            pattern, haystack = COMBINED_BYTES, buf
+        else:
+            pattern, haystack = COMBINED, text
+
+        search = pattern.search
+        match = search(haystack)
+        while match is not None:
+            validator = validators.get(match.lastgroup)
+            if validator is None:
+                return True
+            matched_text = match.group(0)
+            if not isinstance(matched_text, str):
+                matched_text = matched_text.decode('ascii')
+            if validator(matched_text):
+                return True
+            match = search(haystack, match.start() + 1)
+        return False
+
+    def _scan_entities(self, text: str) -> List[Entity]:
+        """Collect validated entities from one pass of the fused pattern.
+
+        The loop is deliberately flat: validator dispatch, list append and
+        span extraction are all hoisted to locals, so on PII-dense inputs
+        (bulk log redaction) the per-match cost is the regex step plus one
+        Entity tuple - no generator frame resume, no method re-lookup.
+
+        An explicit search loop rather than finditer: an accepted match
+        resumes past its end, but a rejected one resumes one character past
+        its start, so a span one type claims but fails to validate stays
+        visible to the other types whose interpretation would have matched
+        inside it (the baseline's independent per-pattern scans had this
+        property for free).
+        """
+        entities: List[Entity] = []
+        if not _may_contain_pii(text):
+            return entities
+
+        validators_get = self._VALIDATORS.get
+        append = entities.append
+
+        # ASCII fast path: scan the encoded buffer with the bytes-compiled
+        # pattern. Equal lengths guarantee pure ASCII, so byte offsets are
+        # character offsets and the (rare) matches decode losslessly.
+        buf = text.encode('utf-8')
+        ascii_input = len(buf) == len(text)
+        pattern, haystack = (COMBINED_BYTES, buf) if ascii_input else (COMBINED, text)
+
+        search = pattern.search
+        match = search(haystack)
+        while match is not None:
+            entity_type = match.lastgroup
+            matched_text = match.group(0)
+            if ascii_input:
+                matched_text = matched_text.decode('ascii')
+            validator = validators_get(entity_type)
+            start, end = match.span()
+            if validator is None or validator(matched_text):
+                # 0.9: high confidence for regex matches
+                append(Entity(entity_type, start, end, 0.9, matched_text))
+                match = search(haystack, end)
+            else:
+                match = search(haystack, start + 1)
+        return entities
     
     def get_detected_entities(self, text: str) -> List[Dict]:
         """Get detailed information about detected PII entities.
@@ -67,119 +267,177 @@ class PIIDetector:
             
         Returns:
             List of dictionaries containing entity type, start, end, and score
+
+        Raises exceptions from the scan through to the caller; the public
+        entry points (contains_sensitive_data, get_entity_summary) hold the
+        fail-closed guards, so the hot path sets up one try frame, not two.
         """
-        try:
-            entities = []
-            
-            for entity_type, pattern in self.PATTERNS.items():
-                for match in pattern.finditer(text):
-                    # Validate matches to reduce false positives
-                    matched_text = match.group(0)
-                    if self._validate_match(entity_type, matched_text):
-                        entities.append({
-                            'entity_type': entity_type,
-                            'start': match.start(),
-                            'end': match.end(),
-                            'score': 0.9,  # High confidence for regex matches
-                            'text': matched_text
-                        })
-            
-            # Remove overlapping entities (keep the longest match)
-            entities = self._remove_overlaps(entities)
-            
-            return entities
-        except Exception as e:
-            # Fail-closed: If detection fails, return a generic PII detection
-            print(f"PII entity detection error (failing closed): {e}")
-            return [{
-                'entity_type': 'UNKNOWN',
-                'start': 0,
-                'end': len(text),
-                'score': 1.0,
-                'text': text[:50] + '...' if len(text) > 50 else text
-            }]
+        # Keep the documented dict shape at the public boundary; the
+        # internal pipeline stays on Entity tuples
+        return [entity._asdict() for entity in self._detect_entities(text)]
+
+    def _detect_entities(self, text: str) -> List[Entity]:
+        """Scan and de-overlap, staying on Entity tuples throughout."""
+        entities = self._scan_entities(text)
+
+        # Remove overlapping entities (keep the longest match)
+        return self._remove_overlaps(entities)
+
+    @staticmethod
+    def _fail_closed_entity(text: str) -> Entity:
+        """Generic whole-text entity reported when a scan fails."""
+        return Entity(
+            'UNKNOWN', 0, len(text), 1.0,
+            text[:50] + '...' if len(text) > 50 else text
+        )
     
     def _validate_match(self, entity_type: str, matched_text: str) -> bool:
         """Validate if a regex match is likely a real PII entity.
-        
+
+        Dispatches through _VALIDATORS instead of an if/elif chain of
+        string comparisons per match; types without a validator pass.
+
         Args:
             entity_type: Type of entity
             matched_text: The matched text
-            
+
         Returns:
             True if match is likely valid, False otherwise
         """
-        # Additional validation for specific entity types
-        if entity_type == 'EMAIL':
-            # Check for common false positives
-            if matched_text.endswith('.png') or matched_text.endswith('.jpg'):
-                return False
-            # Email should have @ symbol
-            return '@' in matched_text
-        
-        elif entity_type == 'PHONE_US':
-            # Remove formatting and check length
-            digits = re.sub(r'\D', '', matched_text)
-            return len(digits) == 10
-        
-        elif entity_type == 'SSN':
-            # SSN should be exactly 9 digits
-            digits = re.sub(r'\D', '', matched_text)
-            # Check for invalid SSN patterns (000-xx-xxxx, xxx-00-xxxx, etc.)
-            parts = matched_text.split('-') if '-' in matched_text else [matched_text]
-            if len(parts) == 3:
-                if parts[0] == '000' or parts[1] == '00':
-                    return False
-            return len(digits) == 9
-        
-        elif entity_type == 'CREDIT_CARD':
-            # Remove formatting and validate with Luhn algorithm
-            digits = re.sub(r'\D', '', matched_text)
-            if len(digits) < 13 or len(digits) > 19:
-                return False
-            # Validate using Luhn algorithm
-            return self._luhn_check(digits)
-        
-        elif entity_type == 'IP_ADDRESS':
-            # Validate IP range
-            parts = matched_text.split('.')
-            if len(parts) != 4:
-                return False
-            try:
-                return all(0 <= int(part) <= 255 for part in parts)
-            except ValueError:
+        validator = self._VALIDATORS.get(entity_type)
+        if validator is None:
+            return True
+        return validator(matched_text)
+
+    @staticmethod
+    def _validate_email(matched_text: str) -> bool:
+        """Reject filename-shaped false positives; require an '@'."""
+        # Check for common false positives
+        if matched_text.endswith('.png') or matched_text.endswith('.jpg'):
+            return False
+        # Email should have @ symbol
+        return '@' in matched_text
+
+    @staticmethod
+    def _validate_phone_us(matched_text: str) -> bool:
+        """US phone numbers carry exactly 10 digits."""
+        # Remove formatting and check length
+        digits = matched_text.translate(_NON_DIGIT_TABLE)
+        return len(digits) == 10
+
+    @staticmethod
+    def _validate_ssn(matched_text: str) -> bool:
+        """SSNs carry exactly 9 digits and valid area/group parts."""
+        digits = matched_text.translate(_NON_DIGIT_TABLE)
+        # Check for invalid SSN patterns (000-xx-xxxx, xxx-00-xxxx, etc.)
+        parts = matched_text.split('-') if '-' in matched_text else [matched_text]
+        if len(parts) == 3:
+            if parts[0] == '000' or parts[1] == '00':
                 return False
-        
-        elif entity_type == 'PHONE_INTERNATIONAL':
-            # International phone must start with + or have minimum 8 digits
-            digits = re.sub(r'\D', '', matched_text)
-            if matched_text.startswith('+'):
-                return len(digits) >= 8  # Minimum for international
-            # If no +, require more digits to avoid false positives
-            return len(digits) >= 10
-        
-        elif entity_type == 'API_KEY':
-            # Additional validation: check if it matches known prefixes or is long enough
-            if matched_text.startswith(('sk-', 'ghp_', 'xoxb-')):
-                return True
-            # For generic long strings, ensure it's at least 40 chars (avoids MD5 hashes)
-            return len(matched_text) >= 40
-        
-        return True
-    
-    def _luhn_check(self, card_number: str) -> bool:
+        return len(digits) == 9
+
+    @staticmethod
+    def _validate_credit_card(matched_text: str) -> bool:
+        """Strip formatting and run the Luhn check."""
+        digits = matched_text.translate(_NON_DIGIT_TABLE)
+        if len(digits) < 13 or len(digits) > 19:
+            return False
+        # Validate using Luhn algorithm
+        return PIIDetector._luhn_check(digits)
+
+    @staticmethod
+    def _validate_ip_address(matched_text: str) -> bool:
+        """Each dotted-quad octet must be in 0..255.
+
+        Checked with int() per octet rather than inet_aton: glibc parses
+        leading-zero octets as octal and rejects '09', which would silently
+        drop addresses like 192.168.09.1 that the baseline accepted. The
+        regex guarantees four runs of 1-3 digits, so int() cannot fail.
+        """
+        return all(int(octet) <= 255 for octet in matched_text.split('.'))
+
+    @staticmethod
+    def _validate_phone_international(matched_text: str) -> bool:
+        """International phone must start with + or have minimum 8 digits."""
+        digits = matched_text.translate(_NON_DIGIT_TABLE)
+        if matched_text.startswith('+'):
+            return len(digits) >= 8  # Minimum for international
+        # If no +, require more digits to avoid false positives
+        return len(digits) >= 10
+
+    # Per-type validator dispatch; built once at class definition time.
+    # API_KEY has no entry: its regex arms (known prefix, or a 40-80 char
+    # alphanumeric run) make every match valid by construction, so the old
+    # startswith/len re-checks were dead weight.
+    _VALIDATORS = {
+        'EMAIL': _validate_email.__func__,
+        'PHONE_US': _validate_phone_us.__func__,
+        'SSN': _validate_ssn.__func__,
+        'CREDIT_CARD': _validate_credit_card.__func__,
+        'IP_ADDRESS': _validate_ip_address.__func__,
+        'PHONE_INTERNATIONAL': _validate_phone_international.__func__,
+    }
+
+    @staticmethod
+    def _luhn_check(card_number: str) -> bool:
         """Validate credit card number using Luhn algorithm.
-        
+
+        16-digit numbers (the overwhelmingly common card length) take a
+        SWAR fast path; other valid lengths fall back to the digit loop.
+
         Args:
             card_number: Credit card number as string (digits only)
-            
+
         Returns:
             True if card number passes Luhn check, False otherwise
         """
+        if len(card_number) == 16:
+            return PIIDetector._luhn_check_swar16(card_number)
+        return PIIDetector._luhn_check_loop(card_number)
+
+    @staticmethod
+    def _luhn_check_swar16(card_number: str) -> bool:
+        """Luhn check for exactly 16 digits using SWAR on packed integers.
+
+        Loads the ASCII digits as two 8-byte big-endian words and does the
+        whole computation with lane-parallel mask/add/shift operations:
+        subtract the ASCII bias, double every second digit from the right
+        (the even byte lanes here), fold doubled lanes over 9 via the
+        (lane+6)>>4 carry trick, then horizontally sum with the classic
+        *0x0101...>>56 multiply. Each step is a single C-level integer op
+        instead of a Python-level branch per digit.
+        """
+        try:
+            buf = card_number.encode('ascii')
+        except UnicodeEncodeError:
+            return False
+
+        total = 0
+        for half in (buf[:8], buf[8:]):
+            x = int.from_bytes(half, 'big') - 0x3030303030303030
+            if x & 0xF0F0F0F0F0F0F0F0:
+                # A lane fell outside '0'..'9'
+                return False
+            # Double the lanes at even positions from the left (= every
+            # second digit from the right for a 16-digit number)
+            doubled = (x & 0xFF00FF00FF00FF00) << 1
+            # Lanes that exceeded 9 need a -9 correction: bit 4 of (lane+6)
+            # is set exactly when lane >= 10
+            over_nine = ((doubled + 0x0606060606060606) & 0x1010101010101010) >> 4
+            doubled -= over_nine * 9
+            word = doubled + (x & 0x00FF00FF00FF00FF)
+            # Horizontal byte sum (max 8 lanes * 18 fits in the top byte)
+            total += (word * 0x0101010101010101) >> 56 & 0xFF
+
+        return total % 10 == 0
+
+    @staticmethod
+    def _luhn_check_loop(card_number: str) -> bool:
+        """Luhn check via the per-digit loop (any length)."""
         try:
             # Reverse the card number
             reversed_digits = card_number[::-1]
-            
+
             # Calculate sum
             total = 0
             for i, digit in enumerate(reversed_digits):
@@ -189,13 +447,13 @@ class PIIDetector:
                     if num > 9:
                         num -= 9  # Sum of digits for two-digit numbers
                 total += num
-            
+
             # Valid if total is divisible by 10
             return total % 10 == 0
         except (ValueError, IndexError):
             return False
     
-    def _remove_overlaps(self, entities: List[Dict]) -> List[Dict]:
+    def _remove_overlaps(self, entities: List[Entity]) -> List[Entity]:
         """Remove overlapping entities, keeping the longest match.
         
         Args:
@@ -206,26 +464,33 @@ class PIIDetector:
         """
         if not entities:
             return entities
-        
-        # Sort by start position
-        entities.sort(key=lambda x: x['start'])
-        
+
+        # Sort by start position, longer entity first on ties, then sweep
+        # once: keep the longest entity of each overlapping cluster and emit
+        # it when the next entity starts past its end. O(k log k) overall,
+        # with no list.remove shuffles.
+        entities.sort(key=lambda x: (x.start, x.start - x.end))
+
+        # Per-iteration lookups cached in locals: start/end/length of the
+        # current entity and the running best, plus the bound append
         non_overlapping = []
-        for entity in entities:
-            # Check if this entity overlaps with any already added
-            overlaps = False
-            for added in non_overlapping:
-                if not (entity['end'] <= added['start'] or entity['start'] >= added['end']):
-                    # They overlap - keep the longer one
-                    if (entity['end'] - entity['start']) > (added['end'] - added['start']):
-                        non_overlapping.remove(added)
-                        non_overlapping.append(entity)
-                    overlaps = True
-                    break
-            
-            if not overlaps:
-                non_overlapping.append(entity)
-        
+        append = non_overlapping.append
+        best = entities[0]
+        best_end = best.end
+        best_length = best_end - best.start
+        for entity in entities[1:]:
+            start = entity.start
+            end = entity.end
+            length = end - start
+            if start < best_end:
+                # Overlaps the current best - keep the longer one
+                if length > best_length:
+                    best, best_end, best_length = entity, end, length
+            else:
+                append(best)
+                best, best_end, best_length = entity, end, length
+        append(best)
+
         return non_overlapping
     
     def get_entity_summary(self, text: str) -> str:
@@ -237,19 +502,21 @@ class PIIDetector:
         Returns:
             Summary string of detected entities
         """
-        entities = self.get_detected_entities(text)
-        
-        if not entities:
+        # Fail-closed at this outermost entry point: a scan failure is
+        # reported as one UNKNOWN entity covering the text
+        try:
+            entities = self._detect_entities(text)
+        except Exception:
+            _log.exception("PII entity detection failed; failing closed")
+            entities = [self._fail_closed_entity(text)]
+
+        # Counter increments in C instead of a hash+branch per entity
+        counts = Counter(entity.entity_type for entity in entities)
+
+        if not counts:
             return "No PII detected"
-        
-        entity_types = {}
-        for entity in entities:
-            entity_type = entity['entity_type']
-            if entity_type not in entity_types:
-                entity_types[entity_type] = 0
-            entity_types[entity_type] += 1
-        
-        summary_parts = [f"{count} {entity_type}(s)" for entity_type, count in entity_types.items()]
+
+        summary_parts = [f"{count} {entity_type}(s)" for entity_type, count in counts.items()]
         return f"Detected: {', '.join(summary_parts)}"
 
 